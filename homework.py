@@ -1,5 +1,8 @@
-from dataclasses import dataclass, asdict
-from typing import ClassVar
+import time
+from collections import deque
+from dataclasses import dataclass, asdict, field
+from typing import (Callable, ClassVar, Deque, Dict, List, Optional, Tuple,
+                    Type)
 
 
 @dataclass
@@ -136,13 +139,15 @@ class Swimming(Training):
                 * self.duration)
 
 
+TRAINING_CLASSES: Dict[str, Type[Training]] = {'SWM': Swimming,
+                                               'RUN': Running,
+                                               'WLK': SportsWalking}
+
+
 def read_package(workout_type: str, data: list) -> Training:
     """Прочитать данные полученные от датчиков."""
     try:
-        training_class: dict(str, Training) = {'SWM': Swimming,
-                                               'RUN': Running,
-                                               'WLK': SportsWalking}
-        return training_class[workout_type](*data)
+        return TRAINING_CLASSES[workout_type](*data)
     except (KeyError, TypeError) as e:
         print('Не верный тип тренировки', e)
 
@@ -156,6 +161,214 @@ def main(training: Training) -> 0:
         raise NotImplementedError('Ошибка, введены не верные данные')
 
 
+def get_percentile(values: List[float], share: float) -> float:
+    """Получить перцентиль значений, share - доля от 0 до 1."""
+
+    if not values:
+        return 0
+    ordered: List[float] = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * share))]
+
+
+@dataclass
+class BatchDecision:
+    """Решение планировщика после обработки микро-пакета."""
+
+    batch_size: int  # Размер обработанного пакета
+    p99_latency: float  # p99 задержки в обработанном пакете, сек
+    throughput: Optional[float]  # Пакетов в секунду с прошлого сброса
+    next_batch_size: int  # Новый лимит размера пакета
+    next_flush_interval: float  # Новый интервал сброса, сек
+
+
+@dataclass
+class BatchLimits:
+    """Текущие лимиты микро-пакета для одного типа тренировки."""
+
+    batch_size: int
+    flush_interval: float
+    last_flush: Optional[float] = None  # Время последнего сброса
+
+
+@dataclass
+class SchedulerMetrics:
+    """Метрики работы планировщика для одного типа тренировки."""
+
+    WINDOW: ClassVar[int] = 1000  # Размер окна для расчёта перцентилей
+
+    processed: int = 0  # Количество обработанных пакетов
+    rejected: int = 0  # Количество пакетов с неверными данными
+    batches: int = 0  # Количество сброшенных микро-пакетов
+    started_at: Optional[float] = None  # Время поступления первого пакета
+    finished_at: Optional[float] = None  # Время последнего сброса
+    latencies: Deque[float] = field(
+        default_factory=lambda: deque(maxlen=SchedulerMetrics.WINDOW))
+    decisions: Deque[BatchDecision] = field(
+        default_factory=lambda: deque(maxlen=SchedulerMetrics.WINDOW))
+
+    def get_p99_latency(self) -> float:
+        """Получить p99 задержки пакетов по скользящему окну."""
+
+        return get_percentile(list(self.latencies), 0.99)
+
+    def get_throughput(self) -> float:
+        """Получить пропускную способность в пакетах в секунду.
+
+        Считается по реальному времени от первого поступившего пакета
+        до последнего сброса.
+        """
+
+        if self.started_at is None or self.finished_at is None:
+            return 0
+        elapsed: float = self.finished_at - self.started_at
+        if elapsed <= 0:
+            return 0
+        return self.processed / elapsed
+
+
+@dataclass
+class MicroBatchScheduler:
+    """Планировщик микро-пакетов с подстройкой под целевой p99.
+
+    Пакеты группируются по типу тренировки, у каждого типа свои лимиты
+    и метрики. Решение принимается по задержкам только что сброшенного
+    пакета: при превышении цели размер пакета и интервал сброса
+    уменьшаются вдвое, а ниже цели растут на шаг (размер - только если
+    пакет был сброшен заполненным).
+
+    Каждый пакет обрабатывается отдельно, поэтому укрупнение само по
+    себе не ускоряет расчёт: пропускная способность равна входящему
+    потоку и только отражается в метриках, а рост пакета лишь
+    расходует запас задержки до цели.
+
+    Своего таймера у планировщика нет: между поступлениями пакетов
+    вызывающий код должен ждать до next_deadline() и вызывать poll(),
+    иначе неполный пакет ждёт следующего поступления.
+    """
+
+    GROW_THRESHOLD: ClassVar[float] = 0.8  # Доля цели для роста пакета
+    INTERVAL_STEP: ClassVar[float] = 0.1  # Шаг интервала в долях цели
+
+    target_p99: float  # Целевой p99 задержки, сек
+    min_batch_size: int = 1
+    max_batch_size: int = 256
+    batch_size: int = 1  # Начальный размер пакета для нового типа
+    flush_interval: float = 0  # Начальный интервал сброса, сек
+    clock: Callable[[], float] = time.monotonic
+    limits: Dict[str, BatchLimits] = field(default_factory=dict)
+    metrics: Dict[str, SchedulerMetrics] = field(default_factory=dict)
+    queues: Dict[str, List[Tuple[float, list]]] = field(default_factory=dict)
+    rejected: int = 0  # Количество пакетов с неизвестным типом тренировки
+
+    def submit(self, workout_type: str, data: list) -> List[str]:
+        """Поставить пакет в очередь и вернуть готовые сообщения."""
+
+        if workout_type not in TRAINING_CLASSES:
+            print('Не верный тип тренировки', workout_type)
+            self.rejected += 1
+            return self.poll()
+        now: float = self.clock()
+        limits: BatchLimits = self.limits.setdefault(
+            workout_type, BatchLimits(self.batch_size, self.flush_interval))
+        metrics: SchedulerMetrics = self.metrics.setdefault(
+            workout_type, SchedulerMetrics())
+        if metrics.started_at is None:
+            metrics.started_at = now
+        queue = self.queues.setdefault(workout_type, [])
+        queue.append((now, data))
+        if len(queue) >= limits.batch_size:
+            return self.flush(workout_type)
+        return self.poll()
+
+    def next_deadline(self) -> Optional[float]:
+        """Получить ближайшее время сброса ожидающей очереди."""
+
+        deadlines: List[float] = [
+            queue[0][0] + self.limits[workout_type].flush_interval
+            for workout_type, queue in self.queues.items() if queue]
+        return min(deadlines, default=None)
+
+    def poll(self) -> List[str]:
+        """Сбросить очереди, в которых пакет ждёт дольше интервала."""
+
+        now: float = self.clock()
+        messages: List[str] = []
+        for workout_type, queue in list(self.queues.items()):
+            interval: float = self.limits[workout_type].flush_interval
+            if queue and now >= queue[0][0] + interval:
+                messages.extend(self.flush(workout_type))
+        return messages
+
+    def flush(self, workout_type: Optional[str] = None) -> List[str]:
+        """Обработать очередь тренировки или все очереди сразу."""
+
+        if workout_type is None:
+            messages: List[str] = []
+            for name in list(self.queues):
+                messages.extend(self.flush(name))
+            return messages
+        batch = self.queues.pop(workout_type, [])
+        if not batch:
+            return []
+        metrics: SchedulerMetrics = self.metrics[workout_type]
+        messages = [message for message in
+                    (self._process(metrics, workout_type, data)
+                     for _, data in batch)
+                    if message is not None]
+        finished: float = self.clock()
+        latencies: List[float] = [finished - enqueued
+                                  for enqueued, _ in batch]
+        metrics.batches += 1
+        metrics.finished_at = finished
+        metrics.latencies.extend(latencies)
+        self._adjust(workout_type, latencies, batch[0][0], finished)
+        return messages
+
+    def _process(self, metrics: SchedulerMetrics,
+                 workout_type: str, data: list) -> Optional[str]:
+        """Получить сообщение о тренировке для одного пакета."""
+
+        try:
+            training: Training = read_package(workout_type, data)
+            if training is None:
+                metrics.rejected += 1
+                return None
+            message: str = training.show_training_info().get_message()
+        except (ArithmeticError, TypeError, ValueError) as e:
+            print('Не верные данные тренировки', e)
+            metrics.rejected += 1
+            return None
+        metrics.processed += 1
+        return message
+
+    def _adjust(self, workout_type: str, latencies: List[float],
+                first_enqueued: float, finished: float) -> None:
+        """Подстроить лимиты типа тренировки под цель p99."""
+
+        limits: BatchLimits = self.limits[workout_type]
+        started: float = (first_enqueued if limits.last_flush is None
+                          else limits.last_flush)
+        elapsed: float = finished - started
+        throughput: Optional[float] = (len(latencies) / elapsed
+                                       if elapsed > 0 else None)
+        p99: float = get_percentile(latencies, 0.99)
+        if p99 > self.target_p99:
+            limits.batch_size = max(self.min_batch_size,
+                                    limits.batch_size // 2)
+            limits.flush_interval /= 2
+        elif p99 < self.target_p99 * self.GROW_THRESHOLD:
+            if len(latencies) >= limits.batch_size:
+                limits.batch_size = min(self.max_batch_size,
+                                        limits.batch_size + 1)
+            limits.flush_interval = min(
+                self.target_p99 * self.GROW_THRESHOLD,
+                limits.flush_interval + self.target_p99 * self.INTERVAL_STEP)
+        limits.last_flush = finished
+        self.metrics[workout_type].decisions.append(
+            BatchDecision(len(latencies), p99, throughput,
+                          limits.batch_size, limits.flush_interval))
+
+
 if __name__ == '__main__':
     packages = [
         ('SWM', [720, 1, 80, 25, 40]),
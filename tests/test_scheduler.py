@@ -0,0 +1,184 @@
+import random
+
+import pytest
+from conftest import Capturing
+
+import homework
+
+
+class FakeClock:
+    """Управляемые часы для детерминированных тестов."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_scheduler_groups_by_workout_type():
+    clock = FakeClock()
+    scheduler = homework.MicroBatchScheduler(target_p99=1, batch_size=2,
+                                             flush_interval=10, clock=clock)
+    assert scheduler.submit('RUN', [15000, 1, 75]) == []
+    assert scheduler.submit('SWM', [720, 1, 80, 25, 40]) == []
+    messages = scheduler.submit('RUN', [15000, 1, 75])
+    assert len(messages) == 2
+    assert all('Running' in message for message in messages)
+    assert list(scheduler.queues) == ['SWM']
+
+
+def test_scheduler_flushes_after_interval():
+    clock = FakeClock()
+    scheduler = homework.MicroBatchScheduler(target_p99=1, batch_size=10,
+                                             flush_interval=0.5, clock=clock)
+    scheduler.submit('WLK', [9000, 1, 75, 180])
+    assert scheduler.poll() == []
+    clock.now = 0.5
+    assert scheduler.poll() == [
+        'Тип тренировки: SportsWalking; '
+        'Длительность: 1.000 ч.; '
+        'Дистанция: 5.850 км; '
+        'Ср. скорость: 5.850 км/ч; '
+        'Потрачено ккал: 349.252.'
+    ]
+    assert scheduler.metrics['WLK'].latencies[-1] == pytest.approx(0.5)
+
+
+def test_scheduler_grow_shrink_regrow():
+    clock = FakeClock()
+    scheduler = homework.MicroBatchScheduler(target_p99=1, clock=clock)
+    limits = []
+
+    def step(now, flush=False):
+        clock.now = now
+        if flush:
+            scheduler.poll()
+        else:
+            scheduler.submit('RUN', [15000, 1, 75])
+        run = scheduler.limits['RUN']
+        limits.append((run.batch_size, pytest.approx(run.flush_interval)))
+
+    step(0)  # Задержка 0 - рост
+    step(1)
+    step(1.5)  # Задержка 0.5 сек - рост
+    step(2)
+    step(4, flush=True)  # Задержка 2 сек - уменьшение вдвое
+    step(4.5)  # Задержка 0 - снова рост
+    assert limits == [
+        (2, 0.1), (2, 0.1), (3, 0.2), (3, 0.2), (1, 0.1), (2, 0.2),
+    ]
+    assert scheduler.metrics['RUN'].processed == 5
+    assert scheduler.metrics['RUN'].get_throughput() == pytest.approx(5 / 4.5)
+
+
+def test_scheduler_keeps_target_with_jittered_arrivals():
+    clock = FakeClock()
+    scheduler = homework.MicroBatchScheduler(target_p99=0.1, clock=clock)
+    rng = random.Random(1)
+    now = 0.0
+    for _ in range(10000):
+        now += 0.01 * (0.5 + rng.random())
+        deadline = scheduler.next_deadline()
+        while deadline is not None and deadline <= now:
+            clock.now = deadline
+            scheduler.poll()
+            deadline = scheduler.next_deadline()
+        clock.now = now
+        scheduler.submit('RUN', [15000, 1, 75])
+    metrics = scheduler.metrics['RUN']
+    assert metrics.get_p99_latency() <= 0.1
+    assert all(decision.p99_latency <= 0.1
+               for decision in metrics.decisions)
+    assert len(metrics.decisions) == homework.SchedulerMetrics.WINDOW
+    assert scheduler.limits['RUN'].flush_interval == pytest.approx(0.08)
+    assert scheduler.limits['RUN'].batch_size <= 16
+
+
+def test_scheduler_next_deadline_flushes_after_pause():
+    clock = FakeClock()
+    scheduler = homework.MicroBatchScheduler(target_p99=1, batch_size=10,
+                                             flush_interval=0.5, clock=clock)
+    assert scheduler.next_deadline() is None
+    clock.now = 2
+    scheduler.submit('WLK', [9000, 1, 75, 180])
+    assert scheduler.next_deadline() == pytest.approx(2.5)
+    clock.now = scheduler.next_deadline()
+    assert len(scheduler.poll()) == 1
+    assert scheduler.next_deadline() is None
+    assert scheduler.metrics['WLK'].latencies[-1] == pytest.approx(0.5)
+    assert scheduler.limits['WLK'].batch_size == 10
+
+
+def test_scheduler_halves_once_after_single_outlier():
+    clock = FakeClock()
+    scheduler = homework.MicroBatchScheduler(target_p99=1, batch_size=64,
+                                             flush_interval=0.8, clock=clock)
+    scheduler.submit('SWM', [720, 1, 80, 25, 40])
+    clock.now = 5
+    scheduler.flush()
+    assert scheduler.limits['SWM'].batch_size == 32
+    assert scheduler.limits['SWM'].flush_interval == pytest.approx(0.4)
+    for _ in range(60):
+        scheduler.submit('SWM', [720, 1, 80, 25, 40])
+        scheduler.flush()
+    assert scheduler.limits['SWM'].batch_size == 32
+    assert scheduler.limits['SWM'].flush_interval == pytest.approx(0.8)
+
+
+def test_scheduler_recovers_after_single_outlier():
+    clock = FakeClock()
+    scheduler = homework.MicroBatchScheduler(target_p99=1, batch_size=4,
+                                             flush_interval=0.2, clock=clock)
+    scheduler.submit('RUN', [15000, 1, 75])
+    clock.now = 5
+    scheduler.flush()
+    run = scheduler.limits['RUN']
+    assert (run.batch_size, run.flush_interval) == (2, pytest.approx(0.1))
+    for now, count in ((6, 2), (7, 3)):
+        clock.now = now
+        for _ in range(count):
+            scheduler.submit('RUN', [15000, 1, 75])
+    assert (run.batch_size, run.flush_interval) == (4, pytest.approx(0.3))
+
+
+def test_scheduler_limits_are_per_workout_type():
+    clock = FakeClock()
+    scheduler = homework.MicroBatchScheduler(target_p99=1, batch_size=8,
+                                             flush_interval=0.8, clock=clock)
+    scheduler.submit('SWM', [720, 1, 80, 25, 40])
+    scheduler.submit('RUN', [15000, 1, 75])
+    clock.now = 5
+    scheduler.flush('SWM')
+    assert scheduler.limits['SWM'].batch_size == 4
+    assert scheduler.limits['RUN'].batch_size == 8
+    assert scheduler.limits['RUN'].flush_interval == pytest.approx(0.8)
+    assert not scheduler.metrics['RUN'].decisions
+
+
+def test_scheduler_keeps_valid_packages_of_batch_with_error():
+    clock = FakeClock()
+    scheduler = homework.MicroBatchScheduler(target_p99=1, batch_size=3,
+                                             flush_interval=10, clock=clock)
+    with Capturing():
+        scheduler.submit('RUN', [15000, 1, 75])
+        scheduler.submit('RUN', [15000, 1, 75])
+        messages = scheduler.submit('RUN', [15000, 0, 75])
+    assert len(messages) == 2
+    metrics = scheduler.metrics['RUN']
+    assert metrics.processed == 2
+    assert metrics.rejected == 1
+    assert metrics.batches == 1
+    assert len(metrics.latencies) == 3
+    assert scheduler.queues == {}
+
+
+def test_scheduler_counts_rejected_packages():
+    scheduler = homework.MicroBatchScheduler(target_p99=1, batch_size=2)
+    with Capturing():
+        assert scheduler.submit('BAD', [1, 2, 3]) == []
+        assert scheduler.flush() == []
+    assert scheduler.rejected == 1
+    assert scheduler.limits == {}
+    assert scheduler.metrics == {}
+    assert scheduler.queues == {}